@@ -1,82 +1,169 @@
-import json
+import atexit
+import copy
 import os
 import logging
-from flask import Flask, render_template, request, redirect, url_for, flash
+import queue
+import threading
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+import orjson
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, session
+from grpc import Compression
 from opentelemetry import trace
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON, ParentBased, Sampler, TraceIdRatioBased
 from opentelemetry.instrumentation.flask import FlaskInstrumentor
 from opentelemetry.trace import SpanKind
-from opentelemetry.exporter.jaeger.thrift import JaegerExporter
+from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 from opentelemetry.sdk.trace import ReadableSpan
 
 # --- Flask App Initialization ---
 app = Flask(__name__)
 app.secret_key = 'secret'
+# Only check templates for changes on disk while debugging
+app.config['TEMPLATES_AUTO_RELOAD'] = os.getenv("FLASK_DEBUG") == "1"
 
 # --- Determine app.py's directory ---
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # --- Data Folder and File Paths ---
 DATA_FOLDER = os.path.join(APP_DIR, 'data')
-COURSE_FILE = os.path.join(DATA_FOLDER, 'course_catalog.json')
+COURSE_FILE = os.path.join(DATA_FOLDER, 'course_catalog.jsonl')  # One course per line (JSON Lines)
+LEGACY_COURSE_FILE = os.path.join(DATA_FOLDER, 'course_catalog.json')  # Pre-JSON Lines format, migrated on startup
 SPAN_LOG_FILE = os.path.join(DATA_FOLDER, 'spans.json')
 APP_LOG_FILE = os.path.join(DATA_FOLDER, 'app_log.json')  # File to store application logs
 
 # Create the data folder if it doesn't exist
 os.makedirs(DATA_FOLDER, exist_ok=True)
+_DATA_FOLDER_READY = True
+
+# --- In-memory course cache, invalidated when the catalog file's mtime changes ---
+# "version" is bumped on every change, even when two writes share one mtime tick
+_COURSE_CACHE = {"mtime": None, "version": 0, "data": [], "index": {}}
+_COURSE_CACHE_LOCK = threading.Lock()
+_COURSE_FH = None  # Append-only handle to COURSE_FILE, opened on first save
+
+# --- Rendered /catalog page as (course cache version, html), replaced in one assignment ---
+_CATALOG_HTML = (None, None)
+# --- Rendered pages that depend on no request data, keyed by template name ---
+_STATIC_HTML_CACHE = {}
+# --- URLs of endpoints without arguments, built on first use ---
+_URL_CACHE = {}
+
+# --- Course fields submitted by the add-course form (all required) ---
+_COURSE_FIELDS = ('code', 'name', 'instructor', 'semester', 'schedule', 'classroom', 'prerequisites', 'grading', 'description')
 
 # --- Logging Setup ---
 log = logging.getLogger(__name__)
 log.setLevel(logging.INFO)
 
-formatter = logging.Formatter(
-    '{"timestamp": "%(asctime)s", "level": "%(levelname)s", "name": "%(name)s", "message": "%(message)s"}'
-)
+class JSONLogFormatter(logging.Formatter):
+    """Format log records as one JSON object per line, escaping the message safely."""
+
+    def format(self, record):
+        log_record = {
+            "timestamp": record.created,
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            log_record["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(log_record).decode()
+
+class ExcInfoQueueHandler(QueueHandler):
+    """QueueHandler that keeps exc_info so JSONLogFormatter can write the traceback separately."""
+
+    def prepare(self, record):
+        # Merge the message arguments on this thread, but leave exception formatting to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+formatter = JSONLogFormatter()
 
 # Console Handler
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(formatter)
-log.addHandler(console_handler)
 
-# File Handler
+# File Handler; records are buffered in memory and written in batches, immediately on ERROR
 file_handler = logging.FileHandler(APP_LOG_FILE)
 file_handler.setFormatter(formatter)
-log.addHandler(file_handler)
+buffered_file_handler = MemoryHandler(capacity=512, flushLevel=logging.ERROR, target=file_handler)
+
+# Both handlers run on a QueueListener thread, so request threads only enqueue records
+log_queue = queue.SimpleQueue()
+log.addHandler(ExcInfoQueueHandler(log_queue))
+log_listener = QueueListener(log_queue, console_handler, buffered_file_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
+# --- Span Serialization Lookups ---
+# Enum names are stringified once instead of once per exported span
+_KIND_STR = {kind: str(kind) for kind in SpanKind}
+_STATUS_CODE_STR = {code: str(code) for code in trace.StatusCode}
+# Shared value for spans without events or links; serializes as []
+_EMPTY = ()
+# Resource attributes converted once per resource: id(resource) -> (resource, attributes)
+_RESOURCE_CACHE = {}
+
+def _resource_attributes(resource):
+    """Return the JSON-ready attributes of a resource, converting each resource only once."""
+    cached = _RESOURCE_CACHE.get(id(resource))
+    if cached is None or cached[0] is not resource:
+        cached = (resource, dict(resource.attributes))
+        _RESOURCE_CACHE[id(resource)] = cached
+    return cached[1]
 
 # --- JSONFileSpanExporter ---
 class JSONFileSpanExporter(SpanExporter):
-    def __init__(self, filename=SPAN_LOG_FILE):
+    def __init__(self, filename=SPAN_LOG_FILE, pretty=False):
         self.filename = filename
+        # Compact NDJSON by default; pretty=True indents each record for reading by hand
+        self._dumps_option = orjson.OPT_APPEND_NEWLINE | (orjson.OPT_INDENT_2 if pretty else 0)
+        ensure_directory_exists(self.filename)
+        # Keep one buffered handle open for the exporter's lifetime
+        self._fh = open(self.filename, "ab", buffering=64 * 1024)
+        self._lock = threading.Lock()
+        self._shutdown = False
 
     def export(self, spans):
+        if self._shutdown:
+            return SpanExportResult.FAILURE
+        if not spans:
+            return SpanExportResult.SUCCESS
         span_data = []
         for span in spans:
             span_dict = self._convert_span_to_dict(span)
             span_data.append(span_dict)
-        ensure_directory_exists(self.filename)
-        with open(self.filename, "a") as json_file:
-            for span_dict in span_data:
-                json.dump(span_dict, json_file, indent=4)
-                json_file.write("\n")
+        # One compact JSON record per line, written in a single call
+        payload = b"".join(orjson.dumps(d, option=self._dumps_option) for d in span_data)
+        with self._lock:
+            if self._shutdown:
+                return SpanExportResult.FAILURE
+            self._fh.write(payload)
+            self._fh.flush()
+        return SpanExportResult.SUCCESS
 
     def _convert_span_to_dict(self, span):
         """Convert a span to a dictionary for JSON serialization."""
         span_dict = {
             "name": span.name,
             "context": {
-                "trace_id": span.context.trace_id,
+                # orjson only handles 64-bit integers, so the 128-bit trace id is written as hex
+                "trace_id": trace.format_trace_id(span.context.trace_id),
                 "span_id": span.context.span_id,
                 "trace_flags": span.context.trace_flags,
                 "is_remote": span.context.is_remote,
             },
-            "kind": str(span.kind),
+            "kind": _KIND_STR[span.kind],
             "parent_id": span.parent.span_id if span.parent else None,
             "start_time": span.start_time,
             "end_time": span.end_time,
             "status": {
-                "status_code": str(span.status.status_code),
+                "status_code": _STATUS_CODE_STR[span.status.status_code],
                 "description": span.status.description,
             },
             "attributes": dict(span.attributes),
@@ -87,206 +174,374 @@ class JSONFileSpanExporter(SpanExporter):
                     "attributes": dict(event.attributes),
                 }
                 for event in span.events
-            ],
+            ] if span.events else _EMPTY,
             "links": [
                 {
                     "context": {
-                        "trace_id": link.context.trace_id,
+                        "trace_id": trace.format_trace_id(link.context.trace_id),
                         "span_id": link.context.span_id,
                     },
                     "attributes": dict(link.attributes),
                 }
                 for link in span.links
-            ],
+            ] if span.links else _EMPTY,
             "resource": {
-                "attributes": dict(span.resource.attributes),
+                "attributes": _resource_attributes(span.resource),
             },
         }
         return span_dict
 
     def shutdown(self):
-        pass
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            self._fh.flush()
+            self._fh.close()
 
     def force_flush(self, timeout_millis: int = 30000) -> bool:
-        pass
+        with self._lock:
+            if not self._shutdown:
+                self._fh.flush()
+        return True
 
 # --- Utility Functions ---
 def ensure_directory_exists(file_path):
     """Creates the directory for the given file path if it doesn't exist."""
     directory = os.path.dirname(file_path)
+    # DATA_FOLDER is created at import; skip the stat/mkdir for files inside it
+    if _DATA_FOLDER_READY and directory == DATA_FOLDER:
+        return
     os.makedirs(directory, exist_ok=True)
 
+def env_int(name, default):
+    """Read an integer setting from the environment, falling back to a default."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        log.warning("Invalid integer %r for %s; using default %s.", value, name, default)
+        return default
+
+def migrate_legacy_course_file():
+    """Convert a course_catalog.json array into COURSE_FILE if no JSON Lines file exists yet."""
+    if os.path.exists(COURSE_FILE) or not os.path.exists(LEGACY_COURSE_FILE):
+        return
+    with open(LEGACY_COURSE_FILE, 'rb') as file:
+        courses = orjson.loads(file.read())
+    # Write to a temporary file first so a failed migration never leaves a partial catalog
+    tmp_file = COURSE_FILE + '.tmp'
+    with open(tmp_file, 'wb') as file:
+        file.write(b"".join(orjson.dumps(course) + b"\n" for course in courses))
+    os.replace(tmp_file, COURSE_FILE)
+    log.info("Migrated %d courses from %s to %s.", len(courses), LEGACY_COURSE_FILE, COURSE_FILE)
+
+def build_course_index(courses):
+    """Map course code to course, keeping the first entry for duplicate codes."""
+    index = {}
+    for course in courses:
+        index.setdefault(course['code'], course)
+    return index
+
+def get_course(code):
+    """Look up a single course by code through the cached index."""
+    load_courses()
+    return _COURSE_CACHE["index"].get(code)
+
+def refresh_course_cache():
+    """Re-read the course file into the cache if its mtime changed.
+
+    Returns (cache_hit, courses, version), with courses and version read together under
+    the cache lock. cache_hit is None and version is None if the file does not exist.
+    """
+    try:
+        mtime = os.stat(COURSE_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None, [], None
+    with _COURSE_CACHE_LOCK:
+        if _COURSE_CACHE["mtime"] == mtime:
+            return True, _COURSE_CACHE["data"], _COURSE_CACHE["version"]
+        with open(COURSE_FILE, 'rb') as file:
+            courses = [orjson.loads(line) for line in file if line.strip()]
+        _COURSE_CACHE["mtime"] = mtime
+        _COURSE_CACHE["data"] = courses
+        _COURSE_CACHE["index"] = build_course_index(courses)
+        _COURSE_CACHE["version"] += 1
+        return False, courses, _COURSE_CACHE["version"]
+
 def load_courses():
-    """Load courses from the JSON file."""
-    with tracer.start_as_current_span("load_courses") as load_span:
+    """Load courses from the JSON Lines file.
+
+    Returns (courses, version); version is None when nothing could be loaded.
+    """
+    with _start_span("load_courses") as load_span:
         try:
-            ensure_directory_exists(COURSE_FILE)
-            if not os.path.exists(COURSE_FILE):
+            cache_hit, courses, version = refresh_course_cache()
+            if cache_hit is None:
                 load_span.set_attribute("course.file_exists", False)
                 log.info("Course catalog file does not exist.")
-                return []
-            with open(COURSE_FILE, 'r') as file:
-                load_span.set_attribute("course.file_exists", True)
-                courses = json.load(file)
+                return [], None
+            load_span.set_attributes({"course.file_exists": True, "course.cache_hit": cache_hit})
+            if not cache_hit:
                 log.info("Courses loaded successfully.")
-                return courses
+            return courses, version
 
         except Exception as e:
             load_span.record_exception(e)
-            load_span.set_status(trace.Status(trace.StatusCode.ERROR))
-            log.error(f"Error loading courses: {e}")
-            return []
+            load_span.set_status(_STATUS_ERROR)
+            log.error("Error loading courses: %s", e)
+            return [], None
 
 def save_courses(data):
-    """Save new course data to the JSON file."""
-    with tracer.start_as_current_span("save_course") as save_span:
+    """Append a new course to the JSON Lines file and the in-memory cache."""
+    global _COURSE_FH
+    with _start_span("save_course") as save_span:
         try:
-            ensure_directory_exists(COURSE_FILE)
-            courses = load_courses()
-            courses.append(data)
-            with open(COURSE_FILE, 'w') as file:
-                json.dump(courses, file, indent=4)
+            # Make sure the cache reflects the file before appending to it,
+            # without opening a nested load_courses span
+            refresh_course_cache()
+            with _COURSE_CACHE_LOCK:
+                if _COURSE_FH is None:
+                    _COURSE_FH = open(COURSE_FILE, 'ab')
+                _COURSE_FH.write(orjson.dumps(data) + b"\n")
+                _COURSE_FH.flush()
+                _COURSE_CACHE["mtime"] = os.fstat(_COURSE_FH.fileno()).st_mtime_ns
+                _COURSE_CACHE["data"].append(data)
+                _COURSE_CACHE["version"] += 1
+                if data['code'] in _COURSE_CACHE["index"]:
+                    log.warning("Duplicate course code '%s'; lookups keep returning the first course.", data['code'])
+                else:
+                    _COURSE_CACHE["index"][data['code']] = data
             save_span.set_attribute("course.saved", True)
-            log.info(f"Course '{data['name']}' saved successfully.")
+            log.info("Course '%s' saved successfully.", data['name'])
         except Exception as e:
             save_span.record_exception(e)
-            save_span.set_status(trace.Status(trace.StatusCode.ERROR))
+            save_span.set_status(_STATUS_ERROR)
             save_span.set_attribute("course.saved", False)
-            log.error(f"Error saving course: {e}")
+            log.error("Error saving course: %s", e)
+
+# Existing installs may still keep their catalog in the old JSON array format
+migrate_legacy_course_file()
+
+# --- Sampling ---
+# Requests that carry no diagnostic value are only traced for a fraction of the time.
+# Routes match FlaskInstrumentor server spans; span names match manual root spans
+# (/manual-trace is excluded from FlaskInstrumentor, so "manual-span" is its root).
+LOW_VALUE_ROUTES = frozenset({"/contacts"})
+LOW_VALUE_SPAN_NAMES = frozenset({"manual-span"})
+LOW_VALUE_SAMPLE_RATIO = 0.1
+
+class LowValueRouteSampler(Sampler):
+    """Ratio-sample root spans for low-value requests and keep every other trace."""
+
+    def __init__(self, routes, span_names, ratio):
+        self._routes = routes
+        self._span_names = span_names
+        self._ratio_sampler = TraceIdRatioBased(ratio)
+
+    def should_sample(self, parent_context, trace_id, name, kind=None, attributes=None, links=None, trace_state=None):
+        # Flask server spans are named "<METHOD> <route>"; compare on the route part
+        if name in self._span_names or name.rpartition(" ")[2] in self._routes:
+            sampler = self._ratio_sampler
+        else:
+            sampler = ALWAYS_ON
+        return sampler.should_sample(parent_context, trace_id, name, kind, attributes, links, trace_state)
+
+    def get_description(self):
+        return f"LowValueRouteSampler{{{self._ratio_sampler.get_description()}}}"
 
 # --- OpenTelemetry Setup ---
 resource = Resource.create({"service.name": "course-catalog-service"})
-trace.set_tracer_provider(TracerProvider(resource=resource))
+sampler = ParentBased(LowValueRouteSampler(LOW_VALUE_ROUTES, LOW_VALUE_SPAN_NAMES, LOW_VALUE_SAMPLE_RATIO))
+trace.set_tracer_provider(TracerProvider(resource=resource, sampler=sampler))
 tracer = trace.get_tracer(__name__)
+# Bound once so request handlers skip the attribute lookups
+_start_span = tracer.start_as_current_span
+_SERVER = SpanKind.SERVER
+_STATUS_ERROR = trace.Status(trace.StatusCode.ERROR)  # Immutable, shared by every error path
 
 # --- Configure Jaeger Exporter ---
-jaeger_exporter = JaegerExporter(
-    agent_host_name="localhost",  # Replace with your Jaeger agent host
-    agent_port=6831,             # Replace with your Jaeger agent port
-)
+# Spans reach Jaeger over OTLP/gRPC (supported natively since Jaeger 1.35).
+# Set JAEGER_ENABLED=0 when no Jaeger collector is running to skip Jaeger export entirely
+JAEGER_ENABLED = os.getenv("JAEGER_ENABLED", "1") == "1"
+if JAEGER_ENABLED:
+    jaeger_exporter = OTLPSpanExporter(
+        endpoint=os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "localhost:4317"),  # Jaeger's OTLP gRPC port
+        insecure=True,
+        compression=Compression.Gzip,
+    )
 
 # --- Create JSON File Exporter ---
 json_exporter = JSONFileSpanExporter(filename=SPAN_LOG_FILE)
 
 # --- Create BatchSpanProcessors ---
-jaeger_span_processor = BatchSpanProcessor(jaeger_exporter)
-json_span_processor = BatchSpanProcessor(json_exporter)
+# Larger queue and batches, exported more often than the SDK defaults.
+# Each value can be overridden through the standard OTEL_BSP_* variables.
+bsp_options = {
+    "max_queue_size": env_int("OTEL_BSP_MAX_QUEUE_SIZE", 4096),
+    "max_export_batch_size": env_int("OTEL_BSP_MAX_EXPORT_BATCH_SIZE", 256),
+    "schedule_delay_millis": env_int("OTEL_BSP_SCHEDULE_DELAY", 1000),
+    "export_timeout_millis": env_int("OTEL_BSP_EXPORT_TIMEOUT", 10000),
+}
+json_span_processor = BatchSpanProcessor(json_exporter, **bsp_options)
 
 # --- Add Span Processors to Tracer Provider ---
-trace.get_tracer_provider().add_span_processor(jaeger_span_processor)
+# The JSON file exporter is always on so local debugging works without Jaeger
+if JAEGER_ENABLED:
+    jaeger_span_processor = BatchSpanProcessor(jaeger_exporter, **bsp_options)
+    trace.get_tracer_provider().add_span_processor(jaeger_span_processor)
 trace.get_tracer_provider().add_span_processor(json_span_processor)
 
-FlaskInstrumentor().instrument_app(app)
+# Trivial endpoints and static files get no automatic server span
+FLASK_EXCLUDED_URLS = "/auto-instrumented,/manual-trace,/static/.*"
+FlaskInstrumentor().instrument_app(app, excluded_urls=FLASK_EXCLUDED_URLS)
+
+def html_cache_enabled():
+    """Rendered pages may be cached unless templates can change while the app runs."""
+    return not (app.debug or app.config['TEMPLATES_AUTO_RELOAD'])
+
+def render_static(template_name):
+    """Render a template that uses no request data, reusing the first rendering."""
+    # Pages carrying flash messages are rendered fresh and never cached
+    if '_flashes' in session or not html_cache_enabled():
+        return render_template(template_name)
+    html = _STATIC_HTML_CACHE.get(template_name)
+    if html is None:
+        html = _STATIC_HTML_CACHE[template_name] = render_template(template_name)
+    return Response(html, mimetype='text/html')
+
+def cached_url(endpoint):
+    """Return url_for(endpoint) for an endpoint without arguments, building it only once."""
+    url = _URL_CACHE.get(endpoint)
+    if url is None:
+        url = _URL_CACHE[endpoint] = url_for(endpoint)
+    return url
 
 # --- Routes ---
 @app.route('/')
 def index():
     log.info("Rendering index page.")
-    return render_template('index.html')
+    return render_static('index.html')
 
 @app.route('/catalog')
 def course_catalog():
-    with tracer.start_as_current_span("course_catalog", kind=SpanKind.SERVER) as span:
-        span.set_attribute("http.method", request.method)
-        span.set_attribute("http.url", request.url)
-        span.set_attribute("http.status_code", 200)
-        span.set_attribute("user.ip", request.remote_addr)
-        with tracer.start_as_current_span("load_courses") as load_span:
-            courses = load_courses()
-            if courses:
-                span.set_attribute("course.count", len(courses))
-            log.info("Rendering course catalog page.")
-        return render_template('course_catalog.html', courses=courses)
+    global _CATALOG_HTML
+    with _start_span("course_catalog", kind=_SERVER) as span:
+        span.set_attributes({
+            "http.method": request.method,
+            "http.url": request.url,
+            "http.status_code": 200,
+            "user.ip": request.remote_addr,
+        })
+        courses, version = load_courses()
+        if courses:
+            span.set_attribute("course.count", len(courses))
+        # Pages carrying flash messages are rendered fresh and never cached
+        cacheable = version is not None and '_flashes' not in session and html_cache_enabled()
+        cached_version, cached_html = _CATALOG_HTML
+        if cacheable and cached_version == version:
+            return Response(cached_html, mimetype='text/html')
+        log.info("Rendering course catalog page.")
+        html = render_template('course_catalog.html', courses=courses)
+        if cacheable:
+            _CATALOG_HTML = (version, html)
+        return html
 
 @app.route('/add_course', methods=['GET', 'POST'])
 def add_course():
     if request.method == 'POST':
-        with tracer.start_as_current_span("add_course", kind=SpanKind.SERVER) as span:
-            span.set_attribute("http.method", request.method)
-            span.set_attribute("http.url", request.url)
-            span.set_attribute("user.ip", request.remote_addr)
+        with _start_span("add_course", kind=_SERVER) as span:
+            span.set_attributes({
+                "http.method": request.method,
+                "http.url": request.url,
+                "user.ip": request.remote_addr,
+            })
+
+            form = request.form
 
             # Check if any required field is empty
-            if any(not request.form.get(field) for field in ['code', 'name', 'instructor', 'semester', 'schedule', 'classroom', 'prerequisites', 'grading', 'description']):
+            missing = [field for field in _COURSE_FIELDS if not form.get(field)]
+            if missing:
                 error_message = "Missing required field(s) in the form."
-                span.set_status(trace.Status(trace.StatusCode.ERROR))
-                span.set_attribute("http.status_code", 400)
+                span.set_status(_STATUS_ERROR)
+                span.set_attributes({
+                    "http.status_code": 400,
+                    "course.missing_fields": missing,
+                })
                 span.record_exception(Exception(error_message))
                 log.error(error_message)
                 flash(error_message, "error")
                 return render_template('add_course.html')
 
-            course = {
-                'code': request.form['code'],
-                'name': request.form['name'],
-                'instructor': request.form['instructor'],
-                'semester': request.form['semester'],
-                'schedule': request.form['schedule'],
-                'classroom': request.form.get('classroom', ''),
-                'prerequisites': request.form.get('prerequisites', ''),
-                'grading': request.form.get('grading', ''),
-                'description': request.form.get('description', '')
-            }
-            span.set_attribute("http.status_code", 200)
-            span.set_attribute("course.code", course['code'])
-            span.set_attribute("course.name", course['name'])
+            course = {field: form[field] for field in _COURSE_FIELDS}
+            span.set_attributes({
+                "http.status_code": 200,
+                "course.code": course['code'],
+                "course.name": course['name'],
+            })
             save_courses(course)
             flash(f"Course '{course['name']}' added successfully!", "success")
-            log.info(f"Course '{course['name']}' added successfully by user {request.remote_addr}.")
-            return redirect(url_for('course_catalog'))
+            log.info("Course '%s' added successfully by user %s.", course['name'], request.remote_addr)
+            return redirect(cached_url('course_catalog'))
     log.info("Rendering add course page.")
     return render_template('add_course.html')
 
 @app.route('/course/<code>')
 def course_details(code):
-    with tracer.start_as_current_span("course_details", kind=SpanKind.SERVER) as span:
+    with _start_span("course_details", kind=_SERVER) as span:
         try:
-            span.set_attribute("http.method", request.method)
-            span.set_attribute("http.url", request.url)
-            span.set_attribute("user.ip", request.remote_addr)
-            courses = load_courses()
-            course = next((course for course in courses if course['code'] == code), None)
+            span.set_attributes({
+                "http.method": request.method,
+                "http.url": request.url,
+                "user.ip": request.remote_addr,
+            })
+            course = get_course(code)
 
             if not course:
-                span.set_status(trace.Status(trace.StatusCode.ERROR))
+                span.set_status(_STATUS_ERROR)
                 span.record_exception(Exception(f"Course not found: {code}"))
                 span.set_attribute("http.status_code", 404)
-                log.warning(f"Course not found: {code}")
+                log.warning("Course not found: %s", code)
                 flash(f"No course found with code '{code}'.", "error")
-                return redirect(url_for('course_catalog'))
-
-            span.set_attribute("http.status_code", 200)
-            span.set_attribute("course.code", course['code'])
-            span.set_attribute("course.name", course['name'])
-            log.info(f"Rendering details page for course: {course['name']}.")
+                return redirect(cached_url('course_catalog'))
+
+            span.set_attributes({
+                "http.status_code": 200,
+                "course.code": course['code'],
+                "course.name": course['name'],
+            })
+            log.info("Rendering details page for course: %s.", course['name'])
             return render_template('course_details.html', course=course)
         except Exception as e:
-            span.set_status(trace.Status(trace.StatusCode.ERROR))
+            span.set_status(_STATUS_ERROR)
             span.record_exception(e)
             span.set_attribute("http.status_code", 500)
-            log.error(f"An error occurred while accessing course details: {e}")
+            log.error("An error occurred while accessing course details: %s", e)
             flash("An error occurred.", "error")
-            return redirect(url_for('index'))
+            return redirect(cached_url('index'))
 
 @app.route("/manual-trace")
 def manual_trace():
-    with tracer.start_as_current_span("manual-span", kind=SpanKind.SERVER) as span:
-        span.set_attribute("http.method", request.method)
-        span.set_attribute("http.url", request.url)
-        span.set_attribute("http.status_code", 200)
+    with _start_span("manual-span", kind=_SERVER) as span:
+        span.set_attributes({
+            "http.method": request.method,
+            "http.url": request.url,
+            "http.status_code": 200,
+        })
         span.add_event("Processing request")
         log.info("Manual trace recorded.")
         return "Manual trace recorded!", 200
 
 @app.route("/auto-instrumented")
 def auto_instrumented():
-    log.info("Auto-instrumented route accessed.")
     return "This route is auto-instrumented!", 200
 
 @app.route('/contacts')
 def contacts():
     log.info("Rendering contacts page.")
-    return render_template('contact.html')
+    return render_static('contact.html')
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=os.getenv("FLASK_DEBUG") == "1")